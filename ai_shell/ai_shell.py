@@ -3,10 +3,14 @@ import json
 import os
 import re
 import time
+import uuid
+from collections import deque
+from dataclasses import asdict
 from datetime import datetime
-from typing import Callable, Dict, List, Tuple
+from itertools import islice
+from typing import Callable, Deque, Dict, List, Tuple
 
-import aiofiles
+import psutil
 
 from .config import config
 from .llm import ai
@@ -16,6 +20,39 @@ from .utils.logger import class_logger, get_logger
 
 logger = get_logger("ai_shell")
 
+HISTORY_FILE = "ai_command_history.jsonl"
+# Single JSON array written by releases before the switch to JSON Lines
+LEGACY_HISTORY_FILE = "ai_command_history.json"
+# Recent "User:"/"AI:" lines kept, and how many of them go into each prompt
+_CONTEXT_SIZE = 20
+_PROMPT_CONTEXT_SIZE = 5
+# The history file is compacted once it holds this many times max_history_size
+_HISTORY_COMPACT_FACTOR = 2
+# Used for appends and rewrites alike, so a rewrite doesn't change permissions
+_HISTORY_FILE_MODE = 0o644
+
+_CODE_BLOCK_RE = re.compile(r"```(?P<lang>[\w+-]*)\n(?P<body>.*?)```", re.DOTALL)
+# Fence tags whose blocks are run with /bin/sh; python, json etc. are skipped.
+# Every block is matched so fences still pair up around the skipped ones
+_SHELL_BLOCK_LANGS = frozenset({"", "bash", "sh", "shell", "zsh", "console"})
+_SHELL_COMMAND_RE = re.compile(
+    r"^[\$\s]*(git\s+\S.*|mkdir\s+.*|cd\s+.*|touch\s+.*|rm\s+.*|mv\s+.*|cp\s+.*|ls\s+.*|cat\s+.*|echo\s+.*|python\s+.*|pip\s+.*|npm\s+.*|yarn\s+.*)",
+    re.MULTILINE,
+)
+_OPTION_RE = re.compile(r"Option:\s*(.*?)\nCommands:\s*((?:.+\n?)*)")
+
+# Static instructions come first so the prompt prefix stays identical across
+# calls and can be served from the provider's prompt cache
+_ERROR_ANALYSIS_PROMPT = (
+    "Analyze the following error and suggest possible corrections. "
+    "Provide options such as 'Recreate repository', 'Update repository', 'Skip', "
+    "or others as appropriate, with commands to fix the issue.\n\n"
+    "Error:\n{error_output}\n\n"
+    "Command:\n{command}"
+)
+
+_READ_CHUNK_SIZE = 64 * 1024
+
 
 def load_prompt(prompt_name: str) -> str:
     prompt_path = os.path.join(
@@ -32,20 +69,171 @@ def load_prompt(prompt_name: str) -> str:
         return ""
 
 
+async def _read_capped(stream: asyncio.StreamReader, limit: int) -> bytes:
+    # Only the head and tail of the output are retained, half of limit each,
+    # so a verbose command can't bloat memory, history or the cache
+    head_size = limit // 2
+    tail_size = limit - head_size
+    head = bytearray()
+    tail = bytearray()
+    dropped = 0
+    while chunk := await stream.read(_READ_CHUNK_SIZE):
+        room = head_size - len(head)
+        if room > 0:
+            head += chunk[:room]
+            chunk = chunk[room:]
+        tail += chunk
+        excess = len(tail) - tail_size
+        if excess > 0:
+            del tail[:excess]
+            dropped += excess
+    if dropped:
+        head += b"\n... [truncated %d bytes] ...\n" % dropped
+    return bytes(head + tail)
+
+
+def _kill_process_tree(pid: int) -> None:
+    # Children are collected before the shell dies and they get reparented,
+    # and the shell is killed first so it can't run its next command once a
+    # child exits. The command stays in our session so it can use the terminal
+    try:
+        parent = psutil.Process(pid)
+        processes = [parent] + parent.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return
+    for proc in processes:
+        try:
+            proc.kill()
+        except psutil.NoSuchProcess:
+            pass
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+    os.fsync(fd)
+
+
+def _append_file(path: str, data: bytes) -> None:
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, _HISTORY_FILE_MODE)
+    try:
+        _write_all(fd, data)
+    finally:
+        os.close(fd)
+
+
+def _read_history_tail(path: str, limit: int) -> Tuple[List[dict], int]:
+    # Compaction keeps the file small, so read it whole but only parse the
+    # entries that fit in the in-memory history
+    with open(path, "rb") as f:
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    tail = lines[-limit:] if limit > 0 else []
+    records = []
+    for line in tail:
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            logger.error("Skipping malformed line in history file.")
+    return records, len(lines)
+
+
+def _read_legacy_history(path: str, limit: int) -> List[dict]:
+    with open(path) as f:
+        content = f.read()
+    records = json.loads(content) if content.strip() else []
+    return records[-limit:] if limit > 0 else []
+
+
+def _write_history(
+    write: Callable[[str, bytes], None], path: str, entries: List[HistoryEntry]
+) -> None:
+    # Serialization runs in the worker thread together with the write
+    payload = "".join(json.dumps(asdict(entry)) + "\n" for entry in entries)
+    write(path, payload.encode())
+
+
+def _fsync_directory(directory: str) -> None:
+    # Makes a rename durable; Windows cannot open directories for fsync
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f"{uuid.uuid4().hex}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, _HISTORY_FILE_MODE)
+    try:
+        _write_all(fd, data)
+    except BaseException:
+        os.close(fd)
+        os.unlink(tmp_path)
+        raise
+    os.close(fd)
+    os.replace(tmp_path, path)
+    _fsync_directory(directory)
+
+
 @class_logger
 class AIShell:
     def __init__(self, ui_handler: UIHandler, max_history_size: int = 100):
         self.ui_handler = ui_handler
         self.max_history_size = max_history_size
-        self.history = []
+        self.history: Deque[HistoryEntry] = deque(maxlen=max_history_size)
         self.config = config
         self.ai = ai
         self.command_generation_prompt = load_prompt("command_generation.md")
         self.error_resolution_prompt = load_prompt("error_resolution.md")
-        self.context = []
+        self.context: Deque[str] = deque(maxlen=_CONTEXT_SIZE)
+        self._history_changed = asyncio.Event()
+        self._history_lock = asyncio.Lock()
+        self._pending_history: List[HistoryEntry] = []
+        self._history_needs_rewrite = False
+        self._history_lines_on_disk = 0
+        self._writer_task = None
 
     async def initialize(self):
         await self._load_history()
+        self._writer_task = asyncio.create_task(self._history_writer())
+        self._writer_task.add_done_callback(self._on_writer_done)
+
+    async def run_shell(self):
+        self.ui_handler.display_welcome_message()
+        try:
+            while True:
+                command = (
+                    await self.ui_handler.get_user_input(self.config.prompt)
+                ).strip()
+                if not command:
+                    continue
+                if command.lower() == self.config.exit_command:
+                    break
+                result = await self.process_command(command)
+                self.ui_handler.display_result(result)
+        except (EOFError, KeyboardInterrupt):
+            pass
+        finally:
+            await self.shutdown()
+
+    async def shutdown(self):
+        if self._writer_task:
+            self._writer_task.cancel()
+            # A writer that already failed was logged by _on_writer_done
+            await asyncio.gather(self._writer_task, return_exceptions=True)
+            self._writer_task = None
+
+        pending = [self.ai.aclose()]
+        if self._history_changed.is_set():
+            pending.append(self._save_history())
+        for result in await asyncio.gather(*pending, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.error(f"Error during shutdown: {str(result)}")
 
     async def process_command(self, command: str) -> AIShellResult:
         if command.lower() in self._get_internal_commands():
@@ -89,15 +277,16 @@ class AIShell:
             self.ui_handler.clear_thinking()
 
     async def _get_ai_response(self, command: str) -> str:
-        logger.info(f"Sending command to LLM: {command}")
-        context_prompt = "\n".join(self.context[-5:])  # Use last 5 context entries
+        logger.info("Sending command to LLM: %s", command)
+        start = max(len(self.context) - _PROMPT_CONTEXT_SIZE, 0)
+        context_prompt = "\n".join(islice(self.context, start, None))
         full_prompt = f"{self.command_generation_prompt}\n\nContext:\n{context_prompt}\n\nUser Command: {command}"
 
         try:
             ai_response = await asyncio.wait_for(
                 self.ai.generate(full_prompt), timeout=30
             )
-            logger.info(f"Full LLM response: {ai_response}")
+            logger.info("Full LLM response: %s", ai_response)
             return ai_response
         except asyncio.TimeoutError:
             logger.error(f"LLM response timed out for command: {command}")
@@ -141,26 +330,32 @@ class AIShell:
     def _update_context(self, command: str, ai_response: str):
         self.context.append(f"User: {command}")
         self.context.append(f"AI: {ai_response}")
-        if len(self.context) > 20:  # Keep last 20 interactions
-            self.context = self.context[-20:]
 
     async def _execute_command(
         self, command: str, timeout: int = 60
     ) -> Tuple[str, int, float]:
+        logger.info("Starting execution of command: %s", command)
+        start_time = time.time()
+        process = await asyncio.create_subprocess_shell(
+            command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
         try:
-            logger.info(f"Starting execution of command: {command}")
-            start_time = time.time()
-            process = await asyncio.create_subprocess_shell(
-                command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(), timeout=timeout
+            stdout, stderr, _ = await asyncio.wait_for(
+                asyncio.gather(
+                    _read_capped(process.stdout, self.config.max_output_bytes),
+                    _read_capped(process.stderr, self.config.max_output_bytes),
+                    process.wait(),
+                ),
+                timeout=timeout,
             )
             end_time = time.time()
             execution_time = end_time - start_time
-            output = stdout.decode().strip() or stderr.decode().strip()
+            # Decode once at the end instead of per line
+            output = (stdout.strip() or stderr.strip()).decode(errors="replace")
             logger.info(
-                f"Command execution completed. Return code: {process.returncode}"
+                "Command execution completed. Return code: %s", process.returncode
             )
             return output, process.returncode, execution_time
         except asyncio.TimeoutError:
@@ -168,6 +363,10 @@ class AIShell:
                 f"Command execution timed out after {timeout} seconds: {command}"
             )
             return f"Command execution timed out after {timeout} seconds", 124, timeout
+        finally:
+            if process.returncode is None:
+                _kill_process_tree(process.pid)
+                await process.wait()
 
     async def _show_progress_with_timeout(self, message: str, timeout: int):
         try:
@@ -178,9 +377,11 @@ class AIShell:
             logger.warning(f"Timeout showing progress: {message}")
 
     async def _handle_command_error(self, command: str, error_output: str):
-        error_analysis_prompt = f"Analyze the following error and suggest possible corrections:\n\nError:\n{error_output}\n\nCommand:\n{command}\n\nProvide options such as 'Recreate repository', 'Update repository', 'Skip', or others as appropriate, with commands to fix the issue."
+        error_analysis_prompt = _ERROR_ANALYSIS_PROMPT.format(
+            error_output=error_output, command=command
+        )
 
-        logger.info(f"Generating error analysis for: {command}")
+        logger.info("Generating error analysis for: %s", command)
 
         error_suggestions = await self._get_ai_response(error_analysis_prompt)
 
@@ -190,7 +391,7 @@ class AIShell:
             )
             return
 
-        logger.info(f"Error analysis suggestions: {error_suggestions}")
+        logger.info("Error analysis suggestions: %s", error_suggestions)
 
         options_with_commands = self._extract_options_with_commands(error_suggestions)
 
@@ -218,7 +419,7 @@ class AIShell:
             logger.error("LLM response is empty.")
             return options_with_commands
 
-        matches = re.findall(r"Option:\s*(.*?)\nCommands:\s*((?:.+\n?)*)", ai_response)
+        matches = _OPTION_RE.findall(ai_response)
         if not matches:
             logger.error("No valid options found in LLM response.")
             return options_with_commands
@@ -251,50 +452,53 @@ class AIShell:
 
     def _clear_history(self):
         self.history.clear()
-        asyncio.create_task(self._save_history())
+        self._pending_history.clear()
+        self._history_needs_rewrite = True
+        self._history_changed.set()
         self.ui_handler.display_success_message("History cleared successfully.")
 
     async def _load_history(self):
-        history_file = "ai_command_history.json"
+        history_file = HISTORY_FILE
+        migrate = not os.path.exists(history_file)
 
-        if not os.path.exists(history_file):
-            logger.info("No history file found. Creating a new one.")
-            self.history = []
-            await self._save_history()
+        if migrate and not os.path.exists(LEGACY_HISTORY_FILE):
+            logger.info("No history file found. Starting with an empty history.")
+            self.history.clear()
             return
 
         try:
-            async with aiofiles.open(history_file, "r") as f:
-                content = await f.read()
-                if not content:
-                    logger.info(
-                        "Empty history file found. Starting with an empty history."
-                    )
-                    self.history = []
-                    return
-
-                history_data = json.loads(content)
-                self.history = []
-                for entry in history_data:
-                    history_entry = HistoryEntry(
-                        command=entry.get("command", "Unknown command"),
-                        output=entry.get("output", "No output"),
-                        ai_response=entry.get("ai_response", "No AI response"),
-                        status=entry.get("status", "Unknown"),
-                        timestamp=entry.get("timestamp", datetime.now().isoformat()),
-                    )
-                    self.history.append(history_entry)
-                if len(self.history) > self.max_history_size:
-                    self.history = self.history[-self.max_history_size :]
-        except json.JSONDecodeError:
-            logger.error("Error decoding history file. Starting with an empty history.")
-            self.history = []
-            await self._save_history()
+            self.history.clear()
+            loaded_at = datetime.now().isoformat()
+            if migrate:
+                logger.info(
+                    "Migrating history from %s to %s", LEGACY_HISTORY_FILE, history_file
+                )
+                records = await asyncio.to_thread(
+                    _read_legacy_history, LEGACY_HISTORY_FILE, self.max_history_size
+                )
+            else:
+                records, self._history_lines_on_disk = await asyncio.to_thread(
+                    _read_history_tail, history_file, self.max_history_size
+                )
+            self.history.extend(
+                HistoryEntry(
+                    command=entry.get("command", "Unknown command"),
+                    output=entry.get("output", "No output"),
+                    ai_response=entry.get("ai_response", "No AI response"),
+                    status=entry.get("status", "Unknown"),
+                    timestamp=entry.get("timestamp", loaded_at),
+                )
+                for entry in records
+            )
+            if migrate:
+                # The next flush writes the migrated entries out as JSON Lines
+                self._history_needs_rewrite = True
+                self._history_changed.set()
         except Exception as e:
             logger.error(
                 f"Error loading history: {str(e)}. Starting with an empty history."
             )
-            self.history = []
+            self.history.clear()
 
     def _append_to_history(
         self, command: str, output: str, ai_response: str, return_code: int
@@ -306,43 +510,60 @@ class AIShell:
             status="Success" if return_code == 0 else "Failed",
             timestamp=datetime.now().isoformat(),
         )
+        # The deque drops the oldest entry once max_history_size is reached
         self.history.append(entry)
-        if len(self.history) > self.max_history_size:
-            self.history.pop(0)
-        asyncio.create_task(self._save_history())
+        self._pending_history.append(entry)
+        self._history_changed.set()
+
+    async def _history_writer(self):
+        # Sleeps until history changes, then waits one flush interval so a
+        # burst of mutations is coalesced into a single write
+        while True:
+            await self._history_changed.wait()
+            await asyncio.sleep(self.config.history_flush_interval)
+            await asyncio.shield(self._save_history())
+
+    def _on_writer_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            # Pending entries are still flushed by shutdown()
+            logger.error(f"History writer stopped unexpectedly: {task.exception()}")
 
     async def _save_history(self):
-        history_file = "ai_command_history.json"
-        try:
-            async with aiofiles.open(history_file, "w") as f:
-                await f.write(
-                    json.dumps(
-                        [
-                            {
-                                "command": entry.command,
-                                "output": entry.output,
-                                "ai_response": entry.ai_response,
-                                "status": entry.status,
-                                "timestamp": entry.timestamp,
-                            }
-                            for entry in self.history
-                        ],
-                        indent=2,
-                    )
-                )
-            logger.info(f"History saved to {history_file}")
-        except Exception as e:
-            logger.error(f"Error saving history: {str(e)}")
+        # History is stored as JSON Lines: new entries are appended, and the
+        # whole file is only rewritten after the history has been cleared or
+        # to compact it once trimmed entries have piled up
+        history_file = HISTORY_FILE
+        async with self._history_lock:
+            self._history_changed.clear()
+            lines_on_disk = self._history_lines_on_disk + len(self._pending_history)
+            compact_at = _HISTORY_COMPACT_FACTOR * self.max_history_size
+            if self._history_needs_rewrite or lines_on_disk > compact_at:
+                entries, write = list(self.history), _atomic_write
+                lines_on_disk = len(entries)
+                self._history_needs_rewrite = False
+            else:
+                entries, write = self._pending_history, _append_file
+            self._pending_history = []
+
+            try:
+                await asyncio.to_thread(_write_history, write, history_file, entries)
+                self._history_lines_on_disk = lines_on_disk
+                logger.info("History saved to %s", history_file)
+            except Exception as e:
+                # The appended tail is unknown after a failed write, so rewrite it
+                self._history_needs_rewrite = True
+                self._history_changed.set()
+                logger.error(f"Error saving history: {str(e)}")
 
     def _extract_commands(self, ai_response: str) -> List[str]:
-        commands = re.findall(r"```(?:bash)?\n(.*?)\n```", ai_response, re.DOTALL)
+        commands = [
+            m.group("body")
+            for m in _CODE_BLOCK_RE.finditer(ai_response)
+            if m.group("lang").lower() in _SHELL_BLOCK_LANGS
+        ]
 
         if not commands:
-            commands = re.findall(
-                r"^[\$\s]*(git\s+\S.*|mkdir\s+.*|cd\s+.*|touch\s+.*|rm\s+.*|mv\s+.*|cp\s+.*|ls\s+.*|cat\s+.*|echo\s+.*|python\s+.*|pip\s+.*|npm\s+.*|yarn\s+.*)",
-                ai_response,
-                re.MULTILINE,
-            )
+            commands = _SHELL_COMMAND_RE.findall(ai_response)
 
         commands = [cmd.strip() for cmd in commands if cmd.strip()]
 
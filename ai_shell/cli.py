@@ -6,30 +6,64 @@ from .ai_shell import AIShell
 from .ui_handler import UIHandler
 
 
-async def main():
-    ui_handler = UIHandler()
-    await ui_handler.initialize()
-    ai_shell = AIShell(ui_handler)
-    await ai_shell.initialize()
+def _install_signal_handlers(loop, callback):
+    # SIGHUP is POSIX-only, and the Windows event loops cannot register signal
+    # handlers at all; there Ctrl+C keeps raising KeyboardInterrupt as usual
+    for name in ("SIGHUP", "SIGTERM", "SIGINT"):
+        sig = getattr(signal, name, None)
+        if sig is None:
+            continue
+        try:
+            loop.add_signal_handler(sig, callback, sig)
+        except NotImplementedError:
+            return
 
-    def signal_handler(sig, frame):
-        print("\nGracefully shutting down...")
-        asyncio.get_event_loop().stop()
 
-    signal.signal(signal.SIGINT, signal_handler)
+async def main() -> int:
+    main_task = asyncio.current_task()
+    received = []
+
+    def on_signal(sig):
+        received.append(sig)
+        main_task.cancel()
 
+    _install_signal_handlers(asyncio.get_running_loop(), on_signal)
+
+    ui_handler = UIHandler()
     try:
+        ai_shell = AIShell(ui_handler)
+        await ai_shell.initialize()
+
         if len(sys.argv) > 1:
             command = " ".join(sys.argv[1:])
-            result = await ai_shell.process_command(command)
-            print(result.message)
+            try:
+                result = await ai_shell.process_command(command)
+                print(result.message)
+            finally:
+                await ai_shell.shutdown()
         else:
             await ai_shell.run_shell()
-    except KeyboardInterrupt:
+    except (asyncio.CancelledError, KeyboardInterrupt):
         print("\nGracefully shutting down...")
+        # Exit like a shell: 128 + signal number, e.g. 130 for Ctrl+C, 143 for SIGTERM.
+        # Without our handlers only Ctrl+C can interrupt, either as KeyboardInterrupt
+        # or by asyncio.run cancelling this task
+        return 128 + (received[0] if received else signal.SIGINT)
     finally:
         ui_handler.display_farewell_message()
+    return 0
+
+
+def run():
+    if sys.platform != "win32":
+        try:
+            import uvloop
+
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            pass
+    sys.exit(asyncio.run(main()))
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run()
@@ -33,6 +33,10 @@ class Config:
             "clear_history_command", "clear_history"
         )
         self.expert_mode: bool = self._config.get("expert_mode", False)
+        self.history_flush_interval: float = self._config.get(
+            "history_flush_interval", 2.0
+        )
+        self.max_output_bytes: int = self._config.get("max_output_bytes", 128 * 1024)
         self.log_file_path = "ai_shell.log"
         self.log_max_bytes = 10 * 1024 * 1024  # 10 MB
         self.log_backup_count = 5
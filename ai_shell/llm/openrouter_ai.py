@@ -1,4 +1,7 @@
+import asyncio
 import os
+import random
+from typing import Optional
 
 import aiohttp
 from dotenv import load_dotenv
@@ -13,13 +16,43 @@ OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL")
 OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 8.0
+_RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class _TransientAPIError(Exception):
+    pass
+
+
+def _backoff_delay(retry: int) -> float:
+    # Truncated exponential backoff with full jitter
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2**retry)))
+
 
 class OpenRouterAI:
     def __init__(self):
         self.model = OPENROUTER_MODEL
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # One pooled session for the whole run, so TLS connections are reused
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=32, ttl_dns_cache=300, keepalive_timeout=60
+                )
+            )
+        return self._session
+
+    async def aclose(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     async def generate(self, prompt: str) -> str:
-        logger.info(f"Generating response for prompt: {prompt[:50]}...")
+        logger.info("Generating response for prompt: %s...", prompt[:50])
 
         headers = {
             "Authorization": f"Bearer {OPENROUTER_API_KEY}",
@@ -31,23 +64,36 @@ class OpenRouterAI:
             "messages": [{"role": "user", "content": prompt}],
         }
 
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    OPENROUTER_URL, json=data, headers=headers
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        generated_text = result["choices"][0]["message"]["content"]
-                        logger.info(f"Generated response: {generated_text[:50]}...")
-                        return generated_text
-                    else:
-                        error_message = await response.text()
-                        logger.error(f"Error from OpenRouter API: {error_message}")
-                        raise Exception(f"OpenRouter API error: {error_message}")
-        except Exception as e:
-            logger.error(f"Error generating response: {str(e)}")
-            raise
+        for retry in range(MAX_RETRIES + 1):
+            try:
+                return await self._post(data, headers)
+            except (_TransientAPIError, aiohttp.ClientError) as e:
+                if retry == MAX_RETRIES:
+                    logger.error(f"Error generating response: {str(e)}")
+                    raise
+                delay = _backoff_delay(retry)
+                logger.warning(
+                    f"Transient OpenRouter error, retrying in {delay:.2f}s: {str(e)}"
+                )
+                await asyncio.sleep(delay)
+            except Exception as e:
+                logger.error(f"Error generating response: {str(e)}")
+                raise
+
+    async def _post(self, data: dict, headers: dict) -> str:
+        async with self._get_session().post(
+            OPENROUTER_URL, json=data, headers=headers
+        ) as response:
+            if response.status == 200:
+                result = await response.json()
+                generated_text = result["choices"][0]["message"]["content"]
+                logger.info("Generated response: %s...", generated_text[:50])
+                return generated_text
+            error_message = await response.text()
+            logger.error(f"Error from OpenRouter API: {error_message}")
+            if response.status in _RETRYABLE_STATUSES:
+                raise _TransientAPIError(f"OpenRouter API error: {error_message}")
+            raise Exception(f"OpenRouter API error: {error_message}")
 
     def get_model_name(self) -> str:
         return self.model
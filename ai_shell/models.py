@@ -10,7 +10,7 @@ class CommandResult:
     results: List[str]
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CommandHistoryEntry:
     command: str
     output: str
@@ -46,7 +46,7 @@ class ConflictResolution:
     ABORT = "abort"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class HistoryEntry:
     command: str
     output: str
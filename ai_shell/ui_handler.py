@@ -1,4 +1,5 @@
-from typing import List, Optional
+from types import MappingProxyType
+from typing import Iterable, List, Optional
 
 from prompt_toolkit import PromptSession
 from prompt_toolkit.formatted_text import HTML
@@ -20,36 +21,62 @@ from rich.table import Table
 from rich.text import Text
 
 from .models import AIShellResult, HistoryEntry
-from .utils.logger import class_logger, get_logger
+from .utils.logger import class_logger, get_logger, setup_logging
 
 logger = get_logger("ui_handler")
 
+_THEME = MappingProxyType(
+    {
+        "header": RichStyle(color="blue", bold=True),
+        "footer": RichStyle(color="green", italic=True),
+        "ai_response": RichStyle(color="cyan"),
+        "user_input": RichStyle(color="yellow"),
+        "error": RichStyle(color="red", bold=True),
+        "success": RichStyle(color="green", bold=True),
+        "progress": RichStyle(color="magenta"),
+        "command": RichStyle(color="bright_yellow"),
+        "output": RichStyle(color="bright_white"),
+    }
+)
+_PROMPT_STYLE = Style.from_dict(
+    {
+        "prompt": "#ansiyellow",
+        "command": "#ansibrightcyan",
+    }
+)
+
+_CONSOLE: Optional[Console] = None
+_PROMPT_SESSION: Optional[PromptSession] = None
+
+
+def _get_console() -> Console:
+    global _CONSOLE
+    if _CONSOLE is None:
+        _CONSOLE = Console()
+        setup_logging(_CONSOLE)
+    return _CONSOLE
+
+
+def _get_prompt_session() -> PromptSession:
+    # Built on the first prompt, so non-interactive runs never pay for it, and
+    # shared by every UIHandler so input history survives across them
+    global _PROMPT_SESSION
+    if _PROMPT_SESSION is None:
+        _PROMPT_SESSION = PromptSession(history=InMemoryHistory())
+    return _PROMPT_SESSION
+
 
 @class_logger
 class UIHandler:
     def __init__(self):
-        self.console = Console()
-        self.prompt_toolkit = None
-        self.theme = {
-            "header": RichStyle(color="blue", bold=True),
-            "footer": RichStyle(color="green", italic=True),
-            "ai_response": RichStyle(color="cyan"),
-            "user_input": RichStyle(color="yellow"),
-            "error": RichStyle(color="red", bold=True),
-            "success": RichStyle(color="green", bold=True),
-            "progress": RichStyle(color="magenta"),
-            "command": RichStyle(color="bright_yellow"),
-            "output": RichStyle(color="bright_white"),
-        }
-        self.prompt_style = Style.from_dict(
-            {
-                "prompt": "#ansiyellow",
-                "command": "#ansibrightcyan",
-            }
-        )
+        self.console = _get_console()
+        self.theme = _THEME
+        self.prompt_style = _PROMPT_STYLE
 
-    async def initialize(self):
-        self.prompt_toolkit = PromptSession(history=InMemoryHistory())
+    async def _prompt(self, message, **kwargs) -> str:
+        return await _get_prompt_session().prompt_async(
+            message, style=self.prompt_style, **kwargs
+        )
 
     def _create_panel(self, content, title, style):
         return Panel(content, title=title, border_style=style, expand=False)
@@ -71,7 +98,7 @@ class UIHandler:
         prompt = HTML(
             "<ansigreen>Execute</ansigreen>, <ansiyellow>edit</ansiyellow>, or <ansired>quit</ansired>? [E/e/Q]: "
         )
-        return await self.prompt_toolkit.prompt_async(prompt, style=self.prompt_style)
+        return await self._prompt(prompt)
 
     async def get_choice(self, prompt: str, options: List[str]) -> Optional[str]:
         table = Table(show_header=False, box=None, expand=True)
@@ -85,9 +112,7 @@ class UIHandler:
 
     async def _get_valid_choice(self, prompt: str, options: List[str]) -> Optional[str]:
         while True:
-            choice = await self.prompt_toolkit.prompt_async(
-                HTML(f"<ansiyellow>{prompt}</ansiyellow> "), style=self.prompt_style
-            )
+            choice = await self._prompt(HTML(f"<ansiyellow>{prompt}</ansiyellow> "))
             if choice.lower() == "q":
                 return None
             try:
@@ -105,10 +130,8 @@ class UIHandler:
             "Editing mode. Press [Enter] to keep the current line unchanged.",
             style=self.theme["user_input"],
         )
-        return await self.prompt_toolkit.prompt_async(
-            HTML("<ansiyellow>Edit the command: </ansiyellow>"),
-            default=command,
-            style=self.prompt_style,
+        return await self._prompt(
+            HTML("<ansiyellow>Edit the command: </ansiyellow>"), default=command
         )
 
     def display_command_output(
@@ -156,20 +179,25 @@ class UIHandler:
         )
         self.console.print(Markdown(help_text), style=self.theme["ai_response"])
 
-    def display_history(self, history: List[HistoryEntry]) -> None:
+    def display_history(self, history: Iterable[HistoryEntry]) -> None:
         table = Table(title="Command History", box=None, expand=True)
         table.add_column("No.", style="cyan", no_wrap=True)
         table.add_column("Command", style="magenta")
         table.add_column("Status", style="green", justify="center")
         table.add_column("Timestamp", style="yellow", justify="right")
 
-        for i, entry in enumerate(history, 1):
-            table.add_row(
+        command_style = self.theme["command"]
+        rows = [
+            (
                 str(i),
-                Text(entry.command, style=self.theme["command"]),
+                Text(entry.command, style=command_style),
                 entry.status,
                 entry.timestamp,
             )
+            for i, entry in enumerate(history, 1)
+        ]
+        for row in rows:
+            table.add_row(*row)
 
         self.console.print(table)
 
@@ -180,9 +208,7 @@ class UIHandler:
         )
 
     async def get_user_input(self, prompt: str) -> str:
-        return await self.prompt_toolkit.prompt_async(
-            HTML(f"<ansiyellow>{prompt}</ansiyellow> "), style=self.prompt_style
-        )
+        return await self._prompt(HTML(f"<ansiyellow>{prompt}</ansiyellow> "))
 
     def display_result(self, result: AIShellResult):
         color = self.theme["success"] if result.success else self.theme["error"]
@@ -201,7 +227,8 @@ class UIHandler:
         return result
 
     def set_theme(self, new_theme: dict):
-        self.theme.update(new_theme)
+        # The default theme is shared and read-only; overrides get their own copy
+        self.theme = {**self.theme, **new_theme}
 
     def display_thinking(self):
         self.console.print("🤔 Thinking...", style=self.theme["ai_response"])
@@ -32,6 +32,7 @@ class LoggerManager:
     def __init__(self):
         self.console: Console | None = None
         self.logger = self._configure_logger()
+        self._loggers: dict[str, structlog.BoundLogger] = {}
 
     def _configure_logger(self) -> structlog.BoundLogger:
         structlog.configure(
@@ -39,6 +40,8 @@ class LoggerManager:
                 structlog.stdlib.filter_by_level,
                 structlog.stdlib.add_logger_name,
                 structlog.stdlib.add_log_level,
+                # Interpolates "%s" args only for records that pass the level filter
+                structlog.stdlib.PositionalArgumentsFormatter(),
                 structlog.processors.TimeStamper(fmt="iso"),
                 structlog.processors.StackInfoRenderer(),
                 structlog.processors.format_exc_info,
@@ -70,14 +73,23 @@ class LoggerManager:
         self.console = console
 
     def get_logger(self, name: str) -> structlog.BoundLogger:
-        return self.logger.bind(module=name, host=config.hostname)
+        bound_logger = self._loggers.get(name)
+        if bound_logger is None:
+            bound_logger = self.logger.bind(module=name, host=config.hostname)
+            self._loggers[name] = bound_logger
+        return bound_logger
 
 
 logger_manager = LoggerManager()
+_logging_setup_done = False
 
 
 def setup_logging(console: Console | None = None) -> None:
+    global _logging_setup_done
+    if _logging_setup_done:
+        return
     logger_manager.setup_logging(console)
+    _logging_setup_done = True
 
 
 def get_logger(name: str) -> structlog.BoundLogger:
@@ -103,37 +115,30 @@ def class_logger(cls: Any) -> Any:
 
         @functools.wraps(method)
         def wrapper(original_method: Callable) -> Callable:
+            qualname = f"{cls.__name__}.{original_method.__name__}"
             if inspect.iscoroutinefunction(original_method):
 
                 async def async_wrapped(*args: Any, **kwargs: Any) -> Any:
-                    logger.debug(f"Entering {cls.__name__}.{original_method.__name__}")
+                    logger.debug("Entering %s", qualname)
                     try:
                         result = await original_method(*args, **kwargs)
-                        logger.debug(
-                            f"Exiting {cls.__name__}.{original_method.__name__}"
-                        )
+                        logger.debug("Exiting %s", qualname)
                         return result
                     except Exception as e:
-                        logger.exception(
-                            f"Exception in {cls.__name__}.{original_method.__name__}: {str(e)}"
-                        )
+                        logger.exception("Exception in %s: %s", qualname, e)
                         raise
 
                 return async_wrapped
             else:
 
                 def sync_wrapped(*args: Any, **kwargs: Any) -> Any:
-                    logger.debug(f"Entering {cls.__name__}.{original_method.__name__}")
+                    logger.debug("Entering %s", qualname)
                     try:
                         result = original_method(*args, **kwargs)
-                        logger.debug(
-                            f"Exiting {cls.__name__}.{original_method.__name__}"
-                        )
+                        logger.debug("Exiting %s", qualname)
                         return result
                     except Exception as e:
-                        logger.exception(
-                            f"Exception in {cls.__name__}.{original_method.__name__}: {str(e)}"
-                        )
+                        logger.exception("Exception in %s: %s", qualname, e)
                         raise
 
                 return sync_wrapped
@@ -147,9 +152,9 @@ def function_logger(func):
     @wraps(func)
     async def wrapper(*args, **kwargs):
         logger = get_logger(func.__name__)
-        logger.info(f"Entering {func.__name__}", args=args, kwargs=kwargs)
+        logger.info("Entering %s", func.__name__, args=args, kwargs=kwargs)
         result = await func(*args, **kwargs)
-        logger.info(f"Exiting {func.__name__}", result=result)
+        logger.info("Exiting %s", func.__name__, result=result)
         return result
 
     return wrapper
@@ -0,0 +1,24 @@
+import asyncio
+import os
+import signal
+from unittest.mock import MagicMock
+
+import pytest
+
+from ai_shell import cli
+
+
+@pytest.mark.asyncio
+async def test_signal_during_initialize_exits_with_signal_status(monkeypatch):
+    async def initialize(self):
+        os.kill(os.getpid(), signal.SIGTERM)
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(cli, "UIHandler", MagicMock())
+    monkeypatch.setattr(cli.AIShell, "initialize", initialize)
+    loop = asyncio.get_running_loop()
+    try:
+        assert await asyncio.create_task(cli.main()) == 128 + signal.SIGTERM
+    finally:
+        for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(sig)
@@ -0,0 +1,67 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from ai_shell.ai_shell import AIShell
+
+
+@pytest.fixture
+def ai_shell():
+    return AIShell(MagicMock())
+
+
+@pytest.mark.asyncio
+async def test_execute_command_returns_stdout(ai_shell):
+    output, return_code, _ = await ai_shell._execute_command("echo hi; echo err >&2")
+
+    assert output == "hi"
+    assert return_code == 0
+
+
+@pytest.mark.asyncio
+async def test_execute_command_falls_back_to_stderr(ai_shell):
+    output, return_code, _ = await ai_shell._execute_command("echo oops >&2; exit 3")
+
+    assert output == "oops"
+    assert return_code == 3
+
+
+@pytest.mark.asyncio
+async def test_execute_command_timeout(ai_shell):
+    output, return_code, _ = await ai_shell._execute_command("sleep 5", timeout=0.2)
+
+    assert return_code == 124
+    assert "timed out" in output
+
+
+@pytest.mark.asyncio
+async def test_execute_command_timeout_kills_process(ai_shell, tmp_path):
+    marker = tmp_path / "marker"
+
+    await ai_shell._execute_command(f"sleep 0.5; touch {marker}", timeout=0.1)
+    await asyncio.sleep(0.8)
+
+    assert not marker.exists()
+
+
+@pytest.mark.asyncio
+async def test_execute_command_caps_large_output(ai_shell):
+    output, return_code, _ = await ai_shell._execute_command(
+        "printf start; head -c 1000000 /dev/zero | tr '\\0' x; printf end"
+    )
+
+    assert return_code == 0
+    assert output.startswith("start")
+    assert output.endswith("end")
+    assert "[truncated" in output
+    assert len(output) < 140 * 1024
+
+
+@pytest.mark.asyncio
+async def test_execute_command_output_cap_is_configurable(ai_shell, monkeypatch):
+    monkeypatch.setattr(ai_shell.config, "max_output_bytes", 8)
+
+    output, _, _ = await ai_shell._execute_command("printf 0123456789abcdef")
+
+    assert output == "0123\n... [truncated 8 bytes] ...\ncdef"
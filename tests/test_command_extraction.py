@@ -0,0 +1,55 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from ai_shell.ai_shell import AIShell
+
+
+@pytest.fixture
+def ai_shell():
+    return AIShell(MagicMock())
+
+
+def test_extract_commands_from_code_block(ai_shell):
+    response = "Run this:\n```bash\nmkdir demo\n```\nthen\n```\nls demo\n```"
+
+    assert ai_shell._extract_commands(response) == ["mkdir demo", "ls demo"]
+
+
+def test_extract_commands_from_tagged_code_blocks(ai_shell):
+    response = "```sh\nls -la\n```\n```shell\npwd\n```"
+
+    assert ai_shell._extract_commands(response) == ["ls -la", "pwd"]
+
+
+def test_extract_commands_skips_non_shell_code_blocks(ai_shell):
+    response = "```python\nimport os\n```\nthen\n```bash\nls\n```"
+
+    assert ai_shell._extract_commands(response) == ["ls"]
+    assert ai_shell._extract_commands("```python\nimport os\n```") == []
+
+
+def test_extract_commands_from_plain_lines(ai_shell):
+    response = "$ git status\nSome explanation\necho done"
+
+    assert ai_shell._extract_commands(response) == ["git status", "echo done"]
+
+
+def test_extract_commands_none_found(ai_shell):
+    assert ai_shell._extract_commands("No commands here.") == []
+
+
+def test_extract_options_with_commands(ai_shell):
+    response = (
+        "Option: Recreate repository\n"
+        "Commands:\n"
+        "rm -rf repo\n"
+        "git clone https://example.com/repo.git\n"
+    )
+
+    assert ai_shell._extract_options_with_commands(response) == {
+        "Recreate repository": [
+            "rm -rf repo",
+            "git clone https://example.com/repo.git",
+        ]
+    }
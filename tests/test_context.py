@@ -0,0 +1,25 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from ai_shell.ai_shell import AIShell
+
+
+@pytest.fixture
+def ai_shell():
+    return AIShell(MagicMock())
+
+
+@pytest.mark.asyncio
+async def test_prompt_uses_recent_context(ai_shell):
+    ai_shell.ai = MagicMock(generate=AsyncMock(return_value="ls"))
+    for i in range(15):
+        ai_shell._update_context(f"cmd {i}", f"reply {i}")
+
+    await ai_shell._get_ai_response("next")
+
+    prompt = ai_shell.ai.generate.await_args.args[0]
+    assert len(ai_shell.context) == 20
+    assert "AI: reply 12\nUser: cmd 13" in prompt
+    assert "AI: reply 14" in prompt
+    assert "User: cmd 12" not in prompt
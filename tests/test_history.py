@@ -0,0 +1,154 @@
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from ai_shell.ai_shell import HISTORY_FILE, LEGACY_HISTORY_FILE, AIShell
+
+
+@pytest.fixture
+async def ai_shell(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    shell = AIShell(MagicMock())
+    await shell.initialize()
+    yield shell
+    await shell.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_history_flushed_on_shutdown(ai_shell, tmp_path):
+    ai_shell._append_to_history("echo one", "one", "", 0)
+    ai_shell._append_to_history("false", "", "", 1)
+
+    await ai_shell.shutdown()
+
+    with open(tmp_path / HISTORY_FILE) as f:
+        history = [json.loads(line) for line in f]
+    assert [entry["command"] for entry in history] == ["echo one", "false"]
+    assert [entry["status"] for entry in history] == ["Success", "Failed"]
+
+
+@pytest.mark.asyncio
+async def test_legacy_json_history_is_migrated(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    legacy = [
+        {"command": "ls", "output": "a.txt", "ai_response": "", "status": "Success"},
+        {"command": "false", "output": "", "ai_response": "", "status": "Failed"},
+    ]
+    (tmp_path / LEGACY_HISTORY_FILE).write_text(json.dumps(legacy))
+
+    shell = AIShell(MagicMock())
+    await shell.initialize()
+    await shell.shutdown()
+
+    assert [entry.command for entry in shell.history] == ["ls", "false"]
+    with open(tmp_path / HISTORY_FILE) as f:
+        history = [json.loads(line) for line in f]
+    assert [entry["command"] for entry in history] == ["ls", "false"]
+
+
+@pytest.mark.asyncio
+async def test_history_reloaded_after_restart(ai_shell, tmp_path):
+    ai_shell._append_to_history("ls", "file.txt", "", 0)
+    await ai_shell.shutdown()
+
+    reloaded = AIShell(MagicMock())
+    await reloaded.initialize()
+    await reloaded.shutdown()
+
+    assert [entry.command for entry in reloaded.history] == ["ls"]
+
+
+@pytest.mark.asyncio
+async def test_history_appends_only_new_entries(ai_shell, tmp_path):
+    ai_shell._append_to_history("echo one", "one", "", 0)
+    await ai_shell._save_history()
+    ai_shell._append_to_history("echo two", "two", "", 0)
+    await ai_shell._save_history()
+
+    with open(tmp_path / HISTORY_FILE) as f:
+        commands = [json.loads(line)["command"] for line in f]
+    assert commands == ["echo one", "echo two"]
+
+
+@pytest.mark.asyncio
+async def test_clear_history_truncates_file(ai_shell, tmp_path):
+    ai_shell._append_to_history("echo one", "one", "", 0)
+    await ai_shell._save_history()
+
+    ai_shell._clear_history()
+    await ai_shell._save_history()
+
+    assert (tmp_path / HISTORY_FILE).read_text() == ""
+
+
+@pytest.mark.asyncio
+async def test_history_writer_flushes_in_background(ai_shell, tmp_path, monkeypatch):
+    monkeypatch.setattr(ai_shell.config, "history_flush_interval", 0)
+
+    history_file = tmp_path / HISTORY_FILE
+    ai_shell._append_to_history("echo one", "one", "", 0)
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if history_file.exists() and history_file.read_text():
+            break
+
+    commands = [json.loads(line)["command"] for line in history_file.open()]
+    assert commands == ["echo one"]
+
+
+@pytest.mark.asyncio
+async def test_history_file_is_compacted(ai_shell, tmp_path):
+    await ai_shell.shutdown()
+    shell = AIShell(MagicMock(), max_history_size=2)
+    await shell.initialize()
+    for i in range(6):
+        shell._append_to_history(f"echo {i}", str(i), "", 0)
+        await shell._save_history()
+    await shell.shutdown()
+
+    with open(tmp_path / HISTORY_FILE) as f:
+        commands = [json.loads(line)["command"] for line in f]
+    assert len(commands) <= 4
+    assert commands[-2:] == ["echo 4", "echo 5"]
+
+
+@pytest.mark.asyncio
+async def test_history_load_keeps_newest_entries(ai_shell, tmp_path):
+    await ai_shell.shutdown()
+    lines = [json.dumps({"command": f"echo {i}"}) for i in range(5)]
+    (tmp_path / HISTORY_FILE).write_text("\n".join(lines) + "\n")
+
+    shell = AIShell(MagicMock(), max_history_size=2)
+    await shell.initialize()
+    await shell.shutdown()
+
+    assert [entry.command for entry in shell.history] == ["echo 3", "echo 4"]
+
+
+@pytest.mark.asyncio
+async def test_history_flushed_after_writer_failure(ai_shell, tmp_path, monkeypatch):
+    monkeypatch.setattr(ai_shell.config, "history_flush_interval", "invalid")
+
+    ai_shell._append_to_history("echo one", "one", "", 0)
+    await asyncio.sleep(0.01)
+    assert ai_shell._writer_task.done()
+
+    await ai_shell.shutdown()
+
+    with open(tmp_path / HISTORY_FILE) as f:
+        assert [json.loads(line)["command"] for line in f] == ["echo one"]
+
+
+@pytest.mark.asyncio
+async def test_history_rewrite_keeps_file_mode(ai_shell, tmp_path):
+    ai_shell._append_to_history("echo one", "one", "", 0)
+    await ai_shell._save_history()
+    mode = (tmp_path / HISTORY_FILE).stat().st_mode
+
+    ai_shell._clear_history()
+    await ai_shell._save_history()
+
+    assert (tmp_path / HISTORY_FILE).stat().st_mode == mode
+    assert [p.name for p in tmp_path.iterdir()] == [HISTORY_FILE]
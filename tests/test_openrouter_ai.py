@@ -0,0 +1,31 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from ai_shell.llm import openrouter_ai
+from ai_shell.llm.openrouter_ai import OpenRouterAI
+
+
+@pytest.fixture
+def ai(monkeypatch):
+    monkeypatch.setattr(openrouter_ai, "BACKOFF_BASE", 0)
+    return OpenRouterAI()
+
+
+@pytest.mark.asyncio
+async def test_generate_retries_transient_errors(ai, monkeypatch):
+    post = AsyncMock(side_effect=[openrouter_ai._TransientAPIError("busy"), "ls -la"])
+    monkeypatch.setattr(ai, "_post", post)
+
+    assert await ai.generate("list files") == "ls -la"
+    assert post.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_generate_does_not_retry_client_errors(ai, monkeypatch):
+    post = AsyncMock(side_effect=Exception("OpenRouter API error: unauthorized"))
+    monkeypatch.setattr(ai, "_post", post)
+
+    with pytest.raises(Exception, match="unauthorized"):
+        await ai.generate("list files")
+    assert post.await_count == 1